@@ -1,18 +1,55 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import sqlite3
-import os
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
+import asyncio
+import datetime
+import hashlib
+import pathlib
+import time
+import aiosqlite
+import orjson
+import pyarrow as pa
 from typing import List, Optional
-
-app = FastAPI(title="Expense Tracker API")
+from database import DB_PATH, init_db, to_epoch_day
 
 # --- Configuration ---
-DB_PATH = os.path.join(os.path.dirname(__file__), "expenses.db")
-DEFAULT_CATEGORIES = ["Food", "Transportation", "Utilities", "Personal Care", "Entertainment", "Health", "Other"]
+DEFAULT_CATEGORIES = ("Food", "Transportation", "Utilities", "Personal Care", "Entertainment", "Health", "Other")
+# The categories never change at runtime, so /categories serves these bytes as-is
+CATEGORIES_JSON = orjson.dumps(DEFAULT_CATEGORIES)
+# Derived from the payload itself, so editing the categories invalidates client caches
+CATEGORIES_ETAG = f'"{hashlib.sha1(CATEGORIES_JSON).hexdigest()[:16]}"'
+CATEGORIES_CACHE_HEADERS = {"Cache-Control": "public, max-age=86400", "ETag": CATEGORIES_ETAG}
+READ_POOL_SIZE = 4
+REPLICA_MAX_AGE = 30  # seconds; bounds staleness for writes made outside this API (MCP server)
+REPLICA_TABLES = ("expenses_daily", "categories")  # all get_summary reads, a few KB
+STREAM_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 10000
+
+INSERT_EXPENSE_SQL = "INSERT INTO expenses(date_i, amount, category_id, subcategory, note) VALUES (?,?,?,?,?)"
+EXPENSE_COLUMNS = ("id", "date", "amount", "category", "subcategory", "note")
+LIST_EXPENSES_SQL = """
+    SELECT e.id, date(e.date_i * 86400, 'unixepoch'), e.amount, c.name, e.subcategory, e.note
+    FROM expenses e JOIN categories c ON c.id = e.category_id
+    WHERE e.date_i BETWEEN ? AND ?
+      AND (? IS NULL OR e.category_id = (SELECT id FROM categories WHERE name = ?))
+    ORDER BY e.date_i DESC, e.id DESC
+    LIMIT ? OFFSET ?
+"""
+EXPENSES_ARROW_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("date", pa.string()),
+    ("amount", pa.float64()),
+    ("category", pa.string()),
+    ("subcategory", pa.string()),
+    ("note", pa.string()),
+])
 
 # --- Pydantic Models (Data Validation) ---
 class ExpenseCreate(BaseModel):
-    date: str
+    date: datetime.date
     amount: float
     category: str
     subcategory: Optional[str] = ""
@@ -21,103 +58,286 @@ class ExpenseCreate(BaseModel):
 class ExpenseResponse(ExpenseCreate):
     id: int
 
+class ExpenseBulkCreate(BaseModel):
+    items: List[ExpenseCreate] = Field(min_length=1)
+
+class ExpenseBulkResponse(BaseModel):
+    count: int
+    first_id: int
+    last_id: int
+
 class DateRange(BaseModel):
-    start_date: str
-    end_date: str
+    start_date: datetime.date
+    end_date: datetime.date
+
+# --- JSON Responses ---
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of the stdlib encoder."""
+
+    def render(self, content):
+        return orjson.dumps(content)
+
+def tuple_to_dict(row):
+    """Map a plain tuple row selected in EXPENSE_COLUMNS order to a dict."""
+    return dict(zip(EXPENSE_COLUMNS, row))
 
 # --- Database Helper ---
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
+async def open_connection(read_only=False):
+    """Open a tuned SQLite connection; read-only ones run in autocommit mode."""
+    if read_only:
+        conn = await aiosqlite.connect(DB_PATH, isolation_level=None)
+    else:
+        conn = await aiosqlite.connect(DB_PATH)
+    # Per-connection settings; journal_mode=WAL is persistent and set once by init_db
+    await conn.execute("PRAGMA synchronous=NORMAL")  # safe in WAL mode
+    await conn.execute("PRAGMA temp_store=MEMORY")
+    await conn.execute("PRAGMA cache_size=-64000")  # ~64 MB page cache
+    await conn.execute("PRAGMA busy_timeout=5000")  # wait up to 5s instead of "database is locked"
+    if read_only:
+        await conn.execute("PRAGMA query_only=1")
     return conn
 
-def init_db():
-    """Initialize the database table if it doesn't exist."""
-    with get_db_connection() as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS expenses(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                amount REAL NOT NULL,
-                category TEXT NOT NULL,
-                subcategory TEXT DEFAULT '',
-                note TEXT DEFAULT ''
-            )
-        """)
+class ConnectionPool:
+    """One writer plus a few read-only connections, kept open so their page caches stay warm."""
+
+    def __init__(self):
+        self._writer = asyncio.Queue(maxsize=1)
+        self._readers = asyncio.Queue()
+
+    @classmethod
+    async def open(cls, readers=READ_POOL_SIZE):
+        pool = cls()
+        pool._writer.put_nowait(await open_connection())
+        for _ in range(readers):
+            pool._readers.put_nowait(await open_connection(read_only=True))
+        return pool
+
+    @asynccontextmanager
+    async def connection(self, read_only=False):
+        """Check out a connection, waiting until one is free."""
+        conns = self._readers if read_only else self._writer
+        conn = await conns.get()
+        try:
+            yield conn
+        except Exception:
+            if not read_only:
+                await conn.rollback()
+            raise
+        finally:
+            conns.put_nowait(conn)
+
+    async def close_all(self):
+        for conns in (self._writer, self._readers):
+            while not conns.empty():
+                await conns.get_nowait().close()
+
+class SummaryReplica:
+    """In-memory copy of the summary tables, re-synced from disk after writes."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = asyncio.Lock()
+        self._writes = 0
+        self._synced_writes = -1
+        self._synced_at = 0.0
+
+    @classmethod
+    async def open(cls):
+        conn = await aiosqlite.connect(":memory:", isolation_level=None, uri=True)
+        await conn.execute("PRAGMA busy_timeout=5000")
+        await conn.execute("ATTACH DATABASE ? AS disk", (pathlib.Path(DB_PATH).as_uri() + "?mode=ro",))
+        # Same layout (and primary keys) as on disk; unqualified names resolve to main first
+        placeholders = ",".join("?" * len(REPLICA_TABLES))
+        async with conn.execute(
+            f"SELECT sql FROM disk.sqlite_master WHERE type = 'table' AND name IN ({placeholders})", REPLICA_TABLES
+        ) as cursor:
+            for (sql,) in await cursor.fetchall():
+                await conn.execute(sql)
+        return cls(conn)
+
+    def mark_stale(self):
+        """Record a committed write; the next query re-copies the summary tables first."""
+        self._writes += 1
+
+    async def _refresh(self):
+        # One transaction, so both tables come from the same snapshot of the file
+        await self._conn.execute("BEGIN")
+        try:
+            for table in REPLICA_TABLES:
+                await self._conn.execute(f"DELETE FROM main.{table}")
+                await self._conn.execute(f"INSERT INTO main.{table} SELECT * FROM disk.{table}")
+        except Exception:
+            await self._conn.rollback()
+            raise
+        await self._conn.commit()
 
-# Initialize DB on startup
-init_db()
+    @asynccontextmanager
+    async def connection(self):
+        """Yield the in-memory connection, refreshing it first if it is out of date."""
+        async with self._lock:
+            if self._synced_writes != self._writes or time.monotonic() - self._synced_at > REPLICA_MAX_AGE:
+                writes = self._writes
+                await self._refresh()
+                self._synced_writes, self._synced_at = writes, time.monotonic()
+            yield self._conn
+
+    async def close(self):
+        await self._conn.close()
+
+def get_db_connection(read_only=False):
+    """Borrow a pooled connection: a reader for GET endpoints, the writer otherwise."""
+    return app.state.pool.connection(read_only=read_only)
+
+async def resolve_category_ids(conn, names):
+    """Map category names to ids on the writer, registering names not seen before."""
+    category_ids = app.state.category_ids
+    missing = [(name,) for name in set(names) if name not in category_ids]
+    if missing:
+        # Committed on their own so the cache never holds ids from a rolled-back transaction
+        await conn.executemany("INSERT OR IGNORE INTO categories(name) VALUES (?)", missing)
+        await conn.commit()
+        async with conn.execute("SELECT name, id FROM categories") as cursor:
+            category_ids.update(await cursor.fetchall())
+    return category_ids
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up the schema and connection pool once on startup; close the pool on shutdown."""
+    # Schema, indexes and journal mode first, before any pooled connection is open
+    await asyncio.to_thread(init_db, DEFAULT_CATEGORIES)
+    app.state.pool = await ConnectionPool.open()
+    async with app.state.pool.connection(read_only=True) as conn:
+        async with conn.execute("SELECT name, id FROM categories") as cursor:
+            app.state.category_ids = dict(await cursor.fetchall())
+    app.state.replica = await SummaryReplica.open()
+    yield
+    await app.state.replica.close()
+    await app.state.pool.close_all()
+
+app = FastAPI(title="Expense Tracker API", lifespan=lifespan, default_response_class=ORJSONResponse)
+# Wide date ranges return large, very repetitive JSON; tiny responses aren't worth compressing
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # --- API Endpoints ---
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Expense Tracker API is running"}
 
 @app.get("/categories", response_model=List[str])
-def get_categories():
+async def get_categories(request: Request):
     """Return a list of categories."""
     # In a real app, you might read this from a file or DB table
-    return DEFAULT_CATEGORIES
+    if request.headers.get("if-none-match") == CATEGORIES_ETAG:
+        return Response(status_code=304, headers=CATEGORIES_CACHE_HEADERS)
+    return Response(content=CATEGORIES_JSON, media_type="application/json", headers=CATEGORIES_CACHE_HEADERS)
 
 @app.post("/expenses/", response_model=ExpenseResponse)
-def add_expense(expense: ExpenseCreate):
+async def add_expense(expense: ExpenseCreate):
     """Add a new expense."""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO expenses(date, amount, category, subcategory, note) VALUES (?,?,?,?,?)",
-                (expense.date, expense.amount, expense.category, expense.subcategory, expense.note)
+        async with get_db_connection() as conn:
+            category_ids = await resolve_category_ids(conn, [expense.category])
+            cursor = await conn.execute(
+                INSERT_EXPENSE_SQL,
+                (to_epoch_day(expense.date), expense.amount, category_ids[expense.category], expense.subcategory, expense.note)
             )
-            conn.commit()
+            await conn.commit()
+            app.state.replica.mark_stale()
             new_id = cursor.lastrowid
-            return {**expense.dict(), "id": new_id}
+            # The body was validated on the way in; returning a Response skips response_model re-validation
+            return ORJSONResponse({**expense.__dict__, "id": new_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/expenses/", response_model=List[ExpenseResponse])
-def list_expenses(start_date: str, end_date: str):
-    """List expenses within a date range."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT id, date, amount, category, subcategory, note
-            FROM expenses
-            WHERE date BETWEEN ? AND ?
-            ORDER BY date DESC, id DESC
-            """,
-            (start_date, end_date)
-        )
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+@app.post("/expenses/bulk", response_model=ExpenseBulkResponse)
+async def add_expenses_bulk(body: ExpenseBulkCreate):
+    """Add many expenses in a single transaction."""
+    try:
+        async with get_db_connection() as conn:
+            category_ids = await resolve_category_ids(conn, [e.category for e in body.items])
+            cursor = await conn.executemany(
+                INSERT_EXPENSE_SQL,
+                [(to_epoch_day(e.date), e.amount, category_ids[e.category], e.subcategory, e.note) for e in body.items]
+            )
+            count = cursor.rowcount
+            cursor = await conn.execute("SELECT last_insert_rowid()")
+            (last_id,) = await cursor.fetchone()
+            await conn.commit()
+            app.state.replica.mark_stale()
+            # The batch holds the write lock for one transaction, so its ids are contiguous
+            return {"count": count, "first_id": last_id - count + 1, "last_id": last_id}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def list_expenses_params(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    category: Optional[str] = None,
+):
+    """Query parameters shared by the list endpoints, as LIST_EXPENSES_SQL bindings."""
+    return (to_epoch_day(start_date), to_epoch_day(end_date), category, category, limit, offset)
+
+# Rows go straight to orjson as ExpenseResponse-shaped lines; nothing is re-validated per row
+@app.get(
+    "/expenses/",
+    response_class=StreamingResponse,
+    responses={200: {"description": "One ExpenseResponse object per line", "content": {"application/x-ndjson": {}}}},
+)
+async def list_expenses(params: tuple = Depends(list_expenses_params)):
+    """Stream a page of expenses within a date range as NDJSON, newest first."""
+    async def row_iter():
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.execute(LIST_EXPENSES_SQL, params) as cursor:
+                while rows := await cursor.fetchmany(STREAM_PAGE_SIZE):
+                    yield b"".join(orjson.dumps(tuple_to_dict(row)) + b"\n" for row in rows)
+
+    return StreamingResponse(row_iter(), media_type="application/x-ndjson")
+
+@app.get(
+    "/expenses.arrow",
+    response_class=Response,
+    responses={200: {"description": "Arrow IPC stream of expenses", "content": {"application/vnd.apache.arrow.stream": {}}}},
+)
+async def list_expenses_arrow(params: tuple = Depends(list_expenses_params)):
+    """List a page of expenses within a date range as an Arrow IPC stream for direct DataFrame loading."""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, EXPENSES_ARROW_SCHEMA) as writer:
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.execute(LIST_EXPENSES_SQL, params) as cursor:
+                while rows := await cursor.fetchmany(STREAM_PAGE_SIZE):
+                    # Transpose the page into columns and append it as one record batch
+                    writer.write_batch(pa.record_batch(list(zip(*rows)), schema=EXPENSES_ARROW_SCHEMA))
+    return Response(sink.getvalue().to_pybytes(), media_type="application/vnd.apache.arrow.stream")
 
 @app.get("/summary/")
-def get_summary(start_date: str, end_date: str):
+async def get_summary(start_date: datetime.date, end_date: datetime.date):
     """Get total expenses grouped by category."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
+    async with app.state.replica.connection() as conn:
+        cursor = await conn.execute(
             """
-            SELECT category, SUM(amount) as total
-            FROM expenses
-            WHERE date BETWEEN ? AND ?
-            GROUP BY category
+            SELECT c.name AS category, SUM(d.total) as total
+            FROM expenses_daily d JOIN categories c ON c.id = d.category_id
+            WHERE d.date_i BETWEEN ? AND ?
+            GROUP BY d.category_id
             ORDER BY total DESC
             """,
-            (start_date, end_date)
+            (to_epoch_day(start_date), to_epoch_day(end_date))
         )
-        rows = cursor.fetchall()
-        return [{"category": row["category"], "total": row["total"]} for row in rows]
+        rows = await cursor.fetchall()
+        return [{"category": category, "total": total} for category, total in rows]
 
 @app.delete("/expenses/{expense_id}")
-def delete_expense(expense_id: int):
+async def delete_expense(expense_id: int):
     """Delete an expense by ID."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
-        conn.commit()
-        if cursor.rowcount == 0:
+    async with get_db_connection() as conn:
+        # RETURNING (SQLite 3.35+) reports the deleted row from the DELETE itself
+        async with conn.execute("DELETE FROM expenses WHERE id = ? RETURNING id", (expense_id,)) as cursor:
+            row = await cursor.fetchone()
+        await conn.commit()
+        if row is None:
             raise HTTPException(status_code=404, detail="Expense not found")
+        app.state.replica.mark_stale()
         return {"message": "Expense deleted successfully"}
\ No newline at end of file
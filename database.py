@@ -0,0 +1,141 @@
+import datetime
+import os
+import sqlite3
+import warnings
+
+# Shared by the FastAPI backend and the MCP server, which both write expenses.db
+DB_PATH = os.path.join(os.path.dirname(__file__), "expenses.db")
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# date_i is days since 1970-01-01: integer range compares and a 1-4 byte varint per record
+EXPENSES_DDL = """
+    CREATE TABLE IF NOT EXISTS expenses(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date_i INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        category_id INTEGER NOT NULL REFERENCES categories(id),
+        subcategory TEXT DEFAULT '',
+        note TEXT DEFAULT ''
+    )
+"""
+EXPENSES_INDEXES = ("idx_exp_date_id", "idx_exp_date_cat_amt")
+ROLLUP_TRIGGERS = ("expenses_daily_insert", "expenses_daily_delete", "expenses_daily_update")
+
+def to_epoch_day(value):
+    """Convert a date or ISO date string to the date_i day number."""
+    if isinstance(value, str):
+        value = datetime.date.fromisoformat(value)
+    return value.toordinal() - EPOCH_ORDINAL
+
+def category_id(conn, name):
+    """Return the id for a category name, registering names not seen before."""
+    conn.execute("INSERT OR IGNORE INTO categories(name) VALUES (?)", (name,))
+    return conn.execute("SELECT id FROM categories WHERE name = ?", (name,)).fetchone()[0]
+
+def _rebuild_expenses(conn, columns):
+    """Rebuild a legacy expenses table (inline category names and/or TEXT dates) in the current layout."""
+    # The rollup and its triggers are keyed on the old columns; they are recreated and backfilled below
+    for trigger in ROLLUP_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS expenses_daily")
+    if "category" in columns:
+        conn.execute("INSERT OR IGNORE INTO categories(name) SELECT DISTINCT category FROM expenses")
+        category_expr, category_join = "c.id", "JOIN categories c ON c.name = e.category"
+    else:
+        category_expr, category_join = "e.category_id", ""
+    if "date" in columns:
+        # Dates used to be free text; rows SQLite can't read are set aside instead of failing startup
+        unparsed = [row[0] for row in conn.execute("SELECT id FROM expenses WHERE date(date) IS NULL")]
+        if unparsed:
+            conn.execute("CREATE TABLE IF NOT EXISTS expenses_unparsed AS SELECT * FROM expenses WHERE 0")
+            conn.execute("INSERT INTO expenses_unparsed SELECT * FROM expenses WHERE date(date) IS NULL")
+            conn.execute("DELETE FROM expenses WHERE date(date) IS NULL")
+            warnings.warn(f"moved expenses with unreadable dates to expenses_unparsed: ids {unparsed}")
+        # date() drops any time part first, so pre-1970 days aren't truncated towards zero
+        date_expr = "CAST(julianday(date(e.date)) - 2440587.5 AS INTEGER)"
+    else:
+        date_expr = "e.date_i"
+    conn.execute("ALTER TABLE expenses RENAME TO expenses_old")
+    conn.execute(EXPENSES_DDL)
+    # Carry the AUTOINCREMENT counter over so ids of deleted rows are never reused
+    conn.execute("INSERT INTO sqlite_sequence(name, seq) SELECT 'expenses', seq FROM sqlite_sequence WHERE name = 'expenses_old'")
+    conn.execute(f"""
+        INSERT INTO expenses(id, date_i, amount, category_id, subcategory, note)
+        SELECT e.id, {date_expr}, e.amount, {category_expr}, e.subcategory, e.note
+        FROM expenses_old e {category_join}
+    """)
+    conn.execute("DROP TABLE expenses_old")
+
+def init_db(categories=()):
+    """Create or upgrade the tables, indexes and rollup triggers, seeding the given categories."""
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    # WAL is recorded in the database file, so every later connection inherits it
+    conn.execute("PRAGMA journal_mode=WAL")
+    # One transaction, so no insert can slip in between creating the rollup and backfilling it
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS categories(
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.executemany("INSERT OR IGNORE INTO categories(name) VALUES (?)", [(name,) for name in categories])
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(expenses)")}
+    if "category" in columns or "date" in columns:
+        _rebuild_expenses(conn, columns)
+    conn.execute(EXPENSES_DDL)
+    # Missing after a fresh create or a rebuild (the old indexes go with the old table)
+    new_indexes = conn.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'index' AND name IN (?, ?)", EXPENSES_INDEXES
+    ).fetchone()[0] < len(EXPENSES_INDEXES)
+    # Range scans for list_expenses; covering index for date-range aggregates over raw rows
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exp_date_id ON expenses(date_i DESC, id DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_exp_date_cat_amt ON expenses(date_i, category_id, amount)")
+
+    # Per-day, per-category totals kept in sync by triggers so get_summary sums few rows
+    has_rollup = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expenses_daily'"
+    ).fetchone()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS expenses_daily(
+            date_i INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            total REAL NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY(date_i, category_id)
+        ) WITHOUT ROWID
+    """)
+    if not has_rollup:
+        conn.execute("""
+            INSERT INTO expenses_daily(date_i, category_id, total, n)
+            SELECT date_i, category_id, SUM(amount), COUNT(*) FROM expenses GROUP BY date_i, category_id
+        """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS expenses_daily_insert AFTER INSERT ON expenses BEGIN
+            INSERT INTO expenses_daily(date_i, category_id, total, n) VALUES (new.date_i, new.category_id, new.amount, 1)
+            ON CONFLICT(date_i, category_id) DO UPDATE SET total = total + excluded.total, n = n + 1;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS expenses_daily_delete AFTER DELETE ON expenses BEGIN
+            UPDATE expenses_daily SET total = total - old.amount, n = n - 1
+            WHERE date_i = old.date_i AND category_id = old.category_id;
+            DELETE FROM expenses_daily WHERE date_i = old.date_i AND category_id = old.category_id AND n = 0;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS expenses_daily_update AFTER UPDATE OF date_i, amount, category_id ON expenses BEGIN
+            UPDATE expenses_daily SET total = total - old.amount, n = n - 1
+            WHERE date_i = old.date_i AND category_id = old.category_id;
+            DELETE FROM expenses_daily WHERE date_i = old.date_i AND category_id = old.category_id AND n = 0;
+            INSERT INTO expenses_daily(date_i, category_id, total, n) VALUES (new.date_i, new.category_id, new.amount, 1)
+            ON CONFLICT(date_i, category_id) DO UPDATE SET total = total + excluded.total, n = n + 1;
+        END
+    """)
+    conn.execute("COMMIT")
+    # Full index scan, so only when the planner has no statistics for new indexes yet
+    if new_indexes:
+        conn.execute("ANALYZE")
+    conn.close()
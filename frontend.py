@@ -1,47 +1,91 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
 import requests
 from datetime import date, timedelta
 import plotly.express as px
 
 # --- Configuration ---
 API_URL = "http://127.0.0.1:8000"  # Address where FastAPI is running
+SESSION = requests.Session()  # keep-alive: reuse one connection across calls and reruns
+TIMEOUT = (1.0, 5.0)  # (connect, read) seconds, so a hung backend can't stall a rerun
 
 st.set_page_config(page_title="💰 Expense Tracker", layout="wide")
 
 st.title("💰 Personal Expense Manager")
+# One slot, so a down backend is reported once per rerun however many calls fail
+backend_status = st.empty()
 
 # --- Helper Functions ---
-def get_categories():
+def fetch_or_last(name, fetch, default, args=()):
+    """Return fetch(), or the last good result of the name helper for the same args if the backend errors."""
     try:
-        response = requests.get(f"{API_URL}/categories")
-        if response.status_code == 200:
-            return response.json()
-    except:
-        st.error("Could not connect to backend. Is FastAPI running?")
-    return ["Others"]
+        result = fetch()
+    except requests.RequestException:
+        last_args, result = st.session_state.get(name, (None, default))
+        if last_args != args:
+            backend_status.error("Could not connect to backend. Is FastAPI running?")
+            return default
+        return result
+    # Only the latest result per helper is kept, so browsing pages doesn't grow the session
+    st.session_state[name] = (args, result)
+    return result
 
-def add_expense_api(data):
-    response = requests.post(f"{API_URL}/expenses/", json=data)
-    return response.status_code == 200
+# Failures raise out of the cached fetchers, so error fallbacks are never cached
+@st.cache_data(ttl=3600)  # categories are constant on the backend
+def fetch_categories():
+    response = SESSION.get(f"{API_URL}/categories", timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.json()
 
-def get_expenses_api(start_date, end_date):
+@st.cache_data(ttl=30)
+def fetch_summary(start_date, end_date):
     params = {"start_date": str(start_date), "end_date": str(end_date)}
-    response = requests.get(f"{API_URL}/expenses/", params=params)
-    if response.status_code == 200:
-        return response.json()
-    return []
+    response = SESSION.get(f"{API_URL}/summary/", params=params, timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def get_categories():
+    return fetch_or_last("categories", fetch_categories, ["Others"])
+
+def add_expense_api(data):
+    try:
+        response = SESSION.post(f"{API_URL}/expenses/", json=data, timeout=TIMEOUT)
+    except requests.RequestException:
+        return False
+    if response.ok:
+        fetch_summary.clear()
+    return response.ok
+
+def get_expenses_df(start_date, end_date, limit, offset=0, category=None):
+    params = {"start_date": str(start_date), "end_date": str(end_date), "limit": limit, "offset": offset}
+    if category:
+        params["category"] = category
+
+    def fetch():
+        response = SESSION.get(f"{API_URL}/expenses.arrow", params=params, timeout=TIMEOUT)
+        response.raise_for_status()
+        # Arrow IPC loads straight into columns, no JSON parsing or type inference
+        return pa.ipc.open_stream(response.content).read_all().to_pandas()
+
+    return fetch_or_last("expenses", fetch, pd.DataFrame(), args=params)
 
 def get_summary_api(start_date, end_date):
-    params = {"start_date": str(start_date), "end_date": str(end_date)}
-    response = requests.get(f"{API_URL}/summary/", params=params)
-    if response.status_code == 200:
-        return response.json()
-    return []
+    return fetch_or_last("summary", lambda: fetch_summary(start_date, end_date), [], args=(start_date, end_date))
+
+def reset_page():
+    """Go back to the first page when the filters that define the result set change."""
+    st.session_state["page"] = 1
 
 def delete_expense_api(expense_id):
-    response = requests.delete(f"{API_URL}/expenses/{expense_id}")
-    return response.status_code == 200
+    try:
+        response = SESSION.delete(f"{API_URL}/expenses/{expense_id}", timeout=TIMEOUT)
+    except requests.RequestException:
+        return False
+    if response.ok:
+        fetch_summary.clear()
+    return response.ok
 
 # --- Sidebar: Global Settings ---
 with st.sidebar:
@@ -49,8 +93,10 @@ with st.sidebar:
     today = date.today()
     first_day_of_month = today.replace(day=1)
     
-    start_date = st.date_input("Start Date", first_day_of_month)
-    end_date = st.date_input("End Date", today)
+    start_date = st.date_input("Start Date", first_day_of_month, on_change=reset_page)
+    end_date = st.date_input("End Date", today, on_change=reset_page)
+
+categories = get_categories()  # shared by the entry form and the category filter
 
 # --- Tabs ---
 tab1, tab2, tab3 = st.tabs(["➕ Add Expense", "📋 View Expenses", "📊 Analytics"])
@@ -67,7 +113,6 @@ with tab1:
             amount = st.number_input("Amount ($)", min_value=0.01, format="%.2f")
         
         with col2:
-            categories = get_categories()
             category = st.selectbox("Category", categories)
             subcategory = st.text_input("Subcategory (Optional)", placeholder="e.g., Uber, Groceries")
             
@@ -95,11 +140,23 @@ with tab1:
 with tab2:
     st.subheader(f"Expenses from {start_date} to {end_date}")
     
-    expenses_data = get_expenses_api(start_date, end_date)
+    # Only the visible page is fetched and rendered
+    col_page, col_size, col_filter = st.columns(3)
+    page = col_page.number_input("Page", min_value=1, step=1, key="page")
+    page_size = col_size.selectbox("Rows per page", [50, 200, 1000], index=1, on_change=reset_page)
+    category_filter = col_filter.selectbox(
+        "Filter by category", ["All"] + categories, key="category_filter", on_change=reset_page
+    )
     
-    if expenses_data:
-        df = pd.DataFrame(expenses_data)
-        
+    df = get_expenses_df(
+        start_date,
+        end_date,
+        limit=page_size,
+        offset=(page - 1) * page_size,
+        category=None if category_filter == "All" else category_filter
+    )
+    
+    if not df.empty:
         # Display as dataframe with formatting
         st.dataframe(
             df,
@@ -122,6 +179,8 @@ with tab2:
                     st.rerun()
                 else:
                     st.error("Could not delete expense. Check ID.")
+    elif page > 1:
+        st.info("No more expenses on this page.")
     else:
         st.info("No expenses found for this date range.")
 
@@ -132,10 +191,12 @@ with tab3:
     summary_data = get_summary_api(start_date, end_date)
     
     if summary_data:
-        df_summary = pd.DataFrame(summary_data)
+        # Build the columns once and hand the same arrays to the metric and both charts
+        cats = np.array([row['category'] for row in summary_data])
+        totals = np.fromiter((row['total'] for row in summary_data), dtype=np.float64, count=len(summary_data))
         
         # Metrics
-        total_spend = df_summary['total'].sum()
+        total_spend = totals.sum()
         col_metrics, col_dummy = st.columns([1, 3])
         col_metrics.metric("Total Period Spending", f"${total_spend:,.2f}")
         
@@ -144,12 +205,12 @@ with tab3:
         
         with col_chart1:
             st.markdown("### By Category (Pie)")
-            fig_pie = px.pie(df_summary, values='total', names='category', hole=0.3)
+            fig_pie = px.pie(values=totals, names=cats, hole=0.3)
             st.plotly_chart(fig_pie, use_container_width=True)
             
         with col_chart2:
             st.markdown("### By Category (Bar)")
-            fig_bar = px.bar(df_summary, x='category', y='total', color='category')
+            fig_bar = px.bar(x=cats, y=totals, color=cats, labels={'x': 'category', 'y': 'total', 'color': 'category'})
             st.plotly_chart(fig_bar, use_container_width=True)
             
     else:
@@ -1,25 +1,12 @@
 from fastmcp import FastMCP
 import os
 import sqlite3
+from database import DB_PATH, category_id, init_db, to_epoch_day
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "expenses.db")
 CATEGORIES_PATH = os.path.join(os.path.dirname(__file__), "categories.json")
 
 mcp = FastMCP("ExpenseTracker")
 
-def init_db():
-    with sqlite3.connect(DB_PATH) as c:
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS expenses(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                amount REAL NOT NULL,
-                category TEXT NOT NULL,
-                subcategory TEXT DEFAULT '',
-                note TEXT DEFAULT ''
-            )
-        """)
-
 init_db()
 
 @mcp.tool()
@@ -27,8 +14,8 @@ def add_expense(date, amount, category, subcategory="", note=""):
     '''Add a new expense entry to the database.'''
     with sqlite3.connect(DB_PATH) as c:
         cur = c.execute(
-            "INSERT INTO expenses(date, amount, category, subcategory, note) VALUES (?,?,?,?,?)",
-            (date, amount, category, subcategory, note)
+            "INSERT INTO expenses(date_i, amount, category_id, subcategory, note) VALUES (?,?,?,?,?)",
+            (to_epoch_day(date), amount, category_id(c, category), subcategory, note)
         )
         return {"status": "ok", "id": cur.lastrowid}
     
@@ -38,12 +25,12 @@ def list_expenses(start_date, end_date):
     with sqlite3.connect(DB_PATH) as c:
         cur = c.execute(
             """
-            SELECT id, date, amount, category, subcategory, note
-            FROM expenses
-            WHERE date BETWEEN ? AND ?
-            ORDER BY id ASC
+            SELECT e.id, date(e.date_i * 86400, 'unixepoch') AS date, e.amount, c.name AS category, e.subcategory, e.note
+            FROM expenses e JOIN categories c ON c.id = e.category_id
+            WHERE e.date_i BETWEEN ? AND ?
+            ORDER BY e.id ASC
             """,
-            (start_date, end_date)
+            (to_epoch_day(start_date), to_epoch_day(end_date))
         )
         cols = [d[0] for d in cur.description]
         return [dict(zip(cols, r)) for r in cur.fetchall()]
@@ -54,18 +41,18 @@ def summarize(start_date, end_date, category=None):
     with sqlite3.connect(DB_PATH) as c:
         query = (
             """
-            SELECT category, SUM(amount) AS total_amount
-            FROM expenses
-            WHERE date BETWEEN ? AND ?
+            SELECT c.name AS category, SUM(e.amount) AS total_amount
+            FROM expenses e JOIN categories c ON c.id = e.category_id
+            WHERE e.date_i BETWEEN ? AND ?
             """
         )
-        params = [start_date, end_date]
+        params = [to_epoch_day(start_date), to_epoch_day(end_date)]
 
         if category:
-            query += " AND category = ?"
+            query += " AND c.name = ?"
             params.append(category)
 
-        query += " GROUP BY category ORDER BY category ASC"
+        query += " GROUP BY e.category_id ORDER BY c.name ASC"
 
         cur = c.execute(query, params)
         cols = [d[0] for d in cur.description]